@@ -1,9 +1,14 @@
+import os
+
+# Use every core for intra-op parallelism; must be set before torch is imported
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 4))
+
 import streamlit as st
 import requests
-from bs4 import BeautifulSoup
-from bias_detector_hf import BiasDetectorHF
-from gemini_handler import GeminiHandler
-import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
 
 st.set_page_config(
     page_title="News Bias Analysis Platform",
@@ -13,189 +18,12 @@ st.set_page_config(
 )
 
 # Professional CSS styling
-st.markdown("""
-    <style>
-    :root {
-        --primary: #1e3a8a;
-        --secondary: #0f172a;
-        --accent: #3b82f6;
-        --success: #10b981;
-        --warning: #f59e0b;
-        --danger: #ef4444;
-        --neutral: #6b7280;
-        --light-bg: #f9fafb;
-    }
-    
-    * {
-        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', 'Oxygen', 'Ubuntu', 'Cantarell', sans-serif;
-    }
-    
-    .header-container {
-        background: linear-gradient(135deg, #0f172a 0%, #1a202c 50%, #0f172a 100%);
-        padding: 3.5rem 2.5rem;
-        border-radius: 16px;
-        margin-bottom: 3rem;
-        box-shadow: 0 20px 40px rgba(0, 0, 0, 0.2);
-        border: 1px solid rgba(59, 130, 246, 0.1);
-    }
-    
-    .header-container h1 {
-        margin: 0;
-        color: #ffffff;
-        font-size: 2.4rem;
-        font-weight: 700;
-        letter-spacing: -0.8px;
-    }
-    
-    .header-container p {
-        margin: 0.5rem 0 0 0;
-        color: #cbd5e1;
-        font-size: 0.98rem;
-        font-weight: 400;
-        letter-spacing: 0.3px;
-    }
-    
-    .input-container {
-        background: #ffffff;
-        padding: 2.5rem;
-        border-radius: 14px;
-        border: 1px solid #d1d5db;
-        margin-bottom: 2.5rem;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06);
-    }
-    
-    .metric-card {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        padding: 2rem;
-        border-radius: 12px;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06);
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-    }
-    
-    .metric-card:hover {
-        box-shadow: 0 8px 20px rgba(0, 0, 0, 0.1);
-        border-color: #cbd5e1;
-        transform: translateY(-2px);
-    }
-    
-    .metric-label {
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        margin-bottom: 0.75rem;
-        color: #6b7280;
-    }
-    
-    .metric-value {
-        font-size: 2.8rem;
-        font-weight: 700;
-        margin: 0;
-        line-height: 1;
-    }
-    
-    .metric-left { color: #dc2626; }
-    .metric-neutral { color: #2563eb; }
-    .metric-right { color: #059669; }
-    
-    .chart-container {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        padding: 2.5rem;
-        border-radius: 14px;
-        border: 1px solid #e2e8f0;
-        margin: 2.5rem 0;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06);
-    }
-    
-    .analysis-result {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        padding: 2.5rem;
-        border-radius: 14px;
-        border-left: 5px solid #3b82f6;
-        margin: 2.5rem 0;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06);
-    }
-    
-    .result-badge {
-        display: inline-block;
-        padding: 0.6rem 1.2rem;
-        border-radius: 6px;
-        font-weight: 600;
-        font-size: 0.95rem;
-        margin-bottom: 1rem;
-    }
-    
-    .badge-neutral { background: #dbeafe; color: #1e40af; }
-    .badge-slightly-left { background: #fee2e2; color: #7f1d1d; }
-    .badge-slightly-right { background: #dcfce7; color: #15803d; }
-    .badge-left { background: #fecaca; color: #7f1d1d; }
-    .badge-right { background: #bbf7d0; color: #15803d; }
-    
-    .summary-text {
-        color: #374151;
-        margin: 1rem 0 0 0;
-        font-size: 0.975rem;
-        line-height: 1.6;
-        letter-spacing: 0.3px;
-    }
-    
-    .divider {
-        height: 1px;
-        background: #e5e7eb;
-        margin: 2rem 0;
-    }
-    
-    .info-box {
-        background: #eff6ff;
-        border-left: 4px solid #3b82f6;
-        padding: 1.25rem;
-        border-radius: 8px;
-        margin-top: 2rem;
-    }
-    
-    .info-box p {
-        margin: 0;
-        color: #1e40af;
-        font-size: 0.95rem;
-        line-height: 1.6;
-    }
-    
-    .error-box {
-        background: #fef2f2;
-        border-left: 4px solid #dc2626;
-        padding: 1.25rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .error-box p {
-        margin: 0;
-        color: #7f1d1d;
-        font-size: 0.95rem;
-    }
-    
-    .section-title {
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: #1e3a8a;
-        margin: 1.5rem 0 1rem 0;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid #e5e7eb;
-    }
-    
-    .meta-info {
-        color: #6b7280;
-        margin: 1rem 0 0 0;
-        font-size: 0.9rem;
-    }
-    
-    .loading-text {
-        color: #3b82f6;
-        font-weight: 500;
-    }
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    with open(os.path.join(os.path.dirname(__file__), "static", "styles.css")) as f:
+        return f.read()
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # Header
 st.markdown("""
@@ -204,34 +32,162 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
+MODEL_ID = "valurank/distilroberta-bias"
+
+# int8 dynamic quantization on the CPU (ONNX and PyTorch); disable to re-verify accuracy
+QUANTIZE = True
+
+# Heavy imports (torch, transformers, Gemini, Plotly) are deferred to the
+# loaders below so the UI paints before the first Analyze click
+
 @st.cache_resource
 def load_detector():
-    return BiasDetectorHF()
+    import torch
+    from bias_detector_hf import BiasDetectorHF
+
+    torch.set_num_threads(os.cpu_count() or 4)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed once inter-op work has started in this process
+        pass
+    torch.backends.mkldnn.enabled = True
+
+    # CPU: ONNX Runtime model when optimum is installed, otherwise a
+    # TorchScript-frozen PyTorch model (both int8 when QUANTIZE); GPU: TensorRT engine
+    # or torch.compile
+    return BiasDetectorHF(MODEL_ID, use_onnx=True, quantize=QUANTIZE)
 
 @st.cache_resource
 def load_gemini_handler():
+    from gemini_handler import GeminiHandler
+
     return GeminiHandler()
 
-detector = load_detector()
-gemini_handler = load_gemini_handler()
+# Shorter input (empty text, cookie banners) is rejected before analysis
+MIN_TEXT_CHARS = 100
+
+# Gemini prompt budget; longer articles are cut before the API call
+SUMMARY_MAX_CHARS = 12000
+
+# Upper bound on downloaded article size (bytes)
+MAX_CONTENT_BYTES = 2_000_000
+
+# Shared session so redirects and repeat fetches reuse pooled connections
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.3)
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Extracted article text is kept on disk across restarts for this long (seconds)
+URL_CACHE_TTL = 3600
+
+@st.cache_resource
+def url_cache():
+    import diskcache
+    from content_cache import CACHE_DIR
+
+    return diskcache.Cache(os.path.join(CACHE_DIR, "extract_text_from_url"))
+
+def header_charset(response):
+    # Only an explicit charset; response.encoding invents ISO-8859-1 for text/*
+    content_type = response.headers.get("Content-Type", "")
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("'\"") or None
+    return None
 
-@st.cache_data
 def extract_text_from_url(url):
+    # Failures raise before the set, so they are never stored
+    cache = url_cache()
+    text = cache.get(url)
+    if text is None:
+        text = fetch_article_text(url)
+        cache.set(url, text, expire=URL_CACHE_TTL)
+    return text
+
+def fetch_article_text(url):
+    response = None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        html = requests.get(url, timeout=10, headers=headers).text
-        soup = BeautifulSoup(html, "html.parser")
-        
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        paragraphs = soup.find_all("p")
-        text = " ".join(p.get_text(strip=True) for p in paragraphs)
-        return text if text.strip() and len(text) > 100 else None
-    except Exception as e:
-        return None
+        response = SESSION.get(url, timeout=10, stream=True)
+
+        # Read at most MAX_CONTENT_BYTES instead of buffering the whole body
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(65536, decode_unicode=False):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total > MAX_CONTENT_BYTES:
+                break
+
+        # The header charset wins; otherwise raw bytes let lxml honour
+        # <meta charset> and XML encoding declarations
+        body = b"".join(chunks)
+        parser = None
+        charset = header_charset(response)
+        if charset:
+            try:
+                parser = lxml.html.HTMLParser(encoding=charset)
+            except LookupError:
+                pass
+        doc = lxml.html.fromstring(body, parser=parser)
+        text = " ".join(filter(None, (p.text_content().strip() for p in doc.iter("p"))))
+        if not text.strip() or len(text) <= 100:
+            raise ValueError("no article text found")
+        return text
+    finally:
+        if response is not None:
+            response.close()
+
+def metric_card(label, value, cls, precision=3):
+    return (
+        f'<div class="metric-card">'
+        f'<div class="metric-label {cls}">{label}</div>'
+        f'<p class="metric-value {cls}">{value:.{precision}f}%</p>'
+        f'</div>'
+    )
+
+# Layout is constant; only the slice values change per analysis.
+# cache_data hands each caller its own copy of the dict.
+@st.cache_data
+def pie_template():
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Pie(
+        labels=["Left Bias", "Neutral", "Right Bias"],
+        marker=dict(colors=["#dc2626", "#2563eb", "#059669"]),
+        hovertemplate="<b>%{label}</b><br>%{value:.3f}%<extra></extra>",
+        textposition="inside",
+        textinfo="label+percent",
+        textfont=dict(size=13, color="white", family="Arial, sans-serif"),
+    )])
+
+    fig.update_layout(
+        height=450,
+        margin=dict(l=20, r=20, t=20, b=20),
+        font=dict(size=12, family="Arial, sans-serif"),
+        showlegend=True,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.02,
+            bgcolor="rgba(0,0,0,0)",
+            bordercolor="rgba(0,0,0,0)"
+        )
+    )
+    return fig.to_dict()
 
 # Input Section
 st.markdown('<div class="input-container">', unsafe_allow_html=True)
@@ -259,8 +215,9 @@ else:
         label_visibility="collapsed"
     )
     if url:
-        text = extract_text_from_url(url)
-        if text is None:
+        try:
+            text = extract_text_from_url(url)
+        except Exception:
             st.markdown("""
                 <div class="error-box">
                     <p><strong>Unable to extract content:</strong> Please verify the URL is valid or paste the text directly.</p>
@@ -282,125 +239,81 @@ with col2:
     )
 
 if analyze_btn:
-    if not text.strip():
-        st.markdown("""
+    # Cheap length check first; skips model work on empty or boilerplate input
+    if len(text) < MIN_TEXT_CHARS or not text.strip():
+        st.markdown(f"""
             <div class="error-box">
-                <p><strong>Input Required:</strong> Please provide article text to analyze.</p>
+                <p><strong>Input Required:</strong> Please provide at least {MIN_TEXT_CHARS} characters of article text to analyze.</p>
             </div>
         """, unsafe_allow_html=True)
-    else:
-        # Create placeholders for progressive loading
-        results_placeholder = st.empty()
-        metrics_placeholder = st.empty()
-        chart_placeholder = st.empty()
-        assessment_placeholder = st.empty()
-        
-        with results_placeholder.container():
-            st.markdown('<h2 class="section-title">Analysis in Progress</h2>', unsafe_allow_html=True)
-            st.info("Processing your content with AI models...")
-        
-        # Detect bias
-        result = detector.detect_bias(text)
-        
-        # Get summary from Gemini
-        summary = gemini_handler.summarize_news(text)
-        
-        # Clear loading message
-        results_placeholder.empty()
-        
-        # Display results
-        st.markdown('<h2 class="section-title">Analysis Results</h2>', unsafe_allow_html=True)
-
-        # Metrics Row
-        metric_col1, metric_col2, metric_col3 = st.columns(3, gap="medium")
-        
-        with metric_col1:
-            st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label metric-left">Left Bias</div>
-                    <p class="metric-value metric-left">{result['left']:.3f}%</p>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        with metric_col2:
-            st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label metric-neutral">Neutral</div>
-                    <p class="metric-value metric-neutral">{result['neutral']:.3f}%</p>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        with metric_col3:
-            st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label metric-right">Right Bias</div>
-                    <p class="metric-value metric-right">{result['right']:.3f}%</p>
-                </div>
-            """, unsafe_allow_html=True)
+        st.stop()
 
-        # Pie Chart
-        st.markdown('<h3 class="section-title">Distribution Breakdown</h3>', unsafe_allow_html=True)
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=["Left Bias", "Neutral", "Right Bias"],
-            values=[result['left'], result['neutral'], result['right']],
-            marker=dict(colors=["#dc2626", "#2563eb", "#059669"]),
-            hovertemplate="<b>%{label}</b><br>%{value:.3f}%<extra></extra>",
-            textposition="inside",
-            textinfo="label+percent",
-            textfont=dict(size=13, color="white", family="Arial, sans-serif"),
-        )])
-        
-        fig.update_layout(
-            height=450,
-            margin=dict(l=20, r=20, t=20, b=20),
-            font=dict(size=12, family="Arial, sans-serif"),
-            showlegend=True,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            legend=dict(
-                orientation="v",
-                yanchor="middle",
-                y=0.5,
-                xanchor="left",
-                x=1.02,
-                bgcolor="rgba(0,0,0,0)",
-                bordercolor="rgba(0,0,0,0)"
-            )
-        )
-        
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        # Overall Assessment
-        st.markdown('<h3 class="section-title">Assessment</h3>', unsafe_allow_html=True)
-        
-        badge_class_map = {
-            "Neutral": "badge-neutral",
-            "Slightly Left": "badge-slightly-left",
-            "Slightly Right": "badge-slightly-right",
-            "Left": "badge-left",
-            "Right": "badge-right",
-        }
-        
-        badge_class = badge_class_map.get(result["overall_bias"], "badge-neutral")
-        
-        st.markdown(f"""
-            <div class="analysis-result">
-                <span class="result-badge {badge_class}">{result["overall_bias"]}</span>
-                <p class="summary-text">
-                    {summary}
-                </p>
-            </div>
-        """, unsafe_allow_html=True)
+    with st.status("Processing your content with AI models...", expanded=False) as status:
+        # Load models on the script thread; the workers below hit the cache
+        detector = load_detector()
+        gemini = load_gemini_handler()
 
-        # Divider
-        st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
-        
-        # Info box
-        st.markdown("""
-            <div class="info-box">
-                <p><strong>Disclaimer:</strong> This analysis uses machine learning models trained on text classification tasks. Results should be considered as one input among multiple sources for comprehensive media literacy assessment. No automated system is 100% accurate.</p>
-            </div>
-        """, unsafe_allow_html=True)
+        # Detect bias locally while Gemini summarizes over the network.
+        # Both calls cache their own non-error results by content.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            bias_future = executor.submit(detector.detect_bias, text)
+            summary_future = executor.submit(gemini.summarize_news, text[:SUMMARY_MAX_CHARS])
+            result = bias_future.result()
+            summary = summary_future.result()
+
+        status.update(label="Analysis complete", state="complete")
+
+    # Display results
+    st.markdown('<h2 class="section-title">Analysis Results</h2>', unsafe_allow_html=True)
+
+    # Metrics Row (single element instead of one per column)
+    card_left = metric_card("Left Bias", result['left'], "metric-left")
+    card_neutral = metric_card("Neutral", result['neutral'], "metric-neutral")
+    card_right = metric_card("Right Bias", result['right'], "metric-right")
+    st.markdown(
+        '<div style="display:grid;grid-template-columns:repeat(3,1fr);gap:1rem">'
+        f'{card_left}{card_neutral}{card_right}</div>',
+        unsafe_allow_html=True
+    )
+
+    # Pie Chart
+    st.markdown('<h3 class="section-title">Distribution Breakdown</h3>', unsafe_allow_html=True)
+
+    fig = pie_template()
+    fig["data"][0]["values"] = [result['left'], result['neutral'], result['right']]
+
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Overall Assessment
+    st.markdown('<h3 class="section-title">Assessment</h3>', unsafe_allow_html=True)
+
+    badge_class_map = {
+        "Neutral": "badge-neutral",
+        "Slightly Left": "badge-slightly-left",
+        "Slightly Right": "badge-slightly-right",
+        "Left": "badge-left",
+        "Right": "badge-right",
+    }
+
+    badge_class = badge_class_map.get(result["overall_bias"], "badge-neutral")
+
+    st.markdown(f"""
+        <div class="analysis-result">
+            <span class="result-badge {badge_class}">{result["overall_bias"]}</span>
+            <p class="summary-text">
+                {summary}
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Divider
+    st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+
+    # Info box
+    st.markdown("""
+        <div class="info-box">
+            <p><strong>Disclaimer:</strong> This analysis uses machine learning models trained on text classification tasks. Results should be considered as one input among multiple sources for comprehensive media literacy assessment. No automated system is 100% accurate.</p>
+        </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,74 @@
+"""
+Content-addressed result cache for methods that take a single text argument
+Keys are BLAKE2b digests of the text, so neither the instance nor the
+(possibly very long) text has to be hashable or kept in memory as a key
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Results persist here across runs when diskcache is installed
+CACHE_DIR = ".content_cache"
+
+_MISSING = object()
+
+
+def content_cached(maxsize=512, persist=True, should_cache=None):
+    """
+    LRU cache keyed on the text's BLAKE2b digest, optionally backed by
+    a diskcache.Cache directory
+    should_cache(result) -> bool lets callers skip caching errors
+    """
+    def decorator(method):
+        memory = OrderedDict()
+        lock = threading.Lock()
+        disk = None
+
+        def get_disk():
+            nonlocal disk
+            if disk is None and persist and diskcache is not None:
+                disk = diskcache.Cache(os.path.join(CACHE_DIR, method.__qualname__))
+            return disk
+
+        @functools.wraps(method)
+        def wrapper(self, text):
+            # Instances can namespace their entries (e.g. per model)
+            namespace = getattr(self, "cache_namespace", "")
+            key = hashlib.blake2b(
+                f"{namespace}\0{text}".encode(), digest_size=16
+            ).digest()
+
+            with lock:
+                if key in memory:
+                    memory.move_to_end(key)
+                    return memory[key]
+
+            store = get_disk()
+            result = store.get(key, _MISSING) if store is not None else _MISSING
+
+            if result is _MISSING:
+                result = method(self, text)
+                if should_cache is not None and not should_cache(result):
+                    return result
+                if store is not None:
+                    store.set(key, result)
+
+            with lock:
+                memory[key] = result
+                memory.move_to_end(key)
+                if len(memory) > maxsize:
+                    memory.popitem(last=False)
+
+            return result
+
+        return wrapper
+
+    return decorator
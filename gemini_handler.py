@@ -4,9 +4,28 @@ Verifies news authenticity and generates summaries
 """
 
 import google.generativeai as genai
+import json
 import os
+from typing import TypedDict
 from dotenv import load_dotenv
 
+from content_cache import content_cached
+
+
+class NewsAnalysis(TypedDict):
+    status: str
+    analysis: str
+    summary: str
+
+
+def _no_error(result):
+    return result['error'] is None
+
+
+def _not_error_summary(summary):
+    return not summary.startswith("Error generating summary:")
+
+
 class GeminiHandler:
     def __init__(self):
         """Initialize Gemini with API key from .env file"""
@@ -21,23 +40,50 @@ class GeminiHandler:
         
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
-    
-    def verify_news(self, news_text):
-        """
-        Verify if the news is true or potentially fake
-        Returns: dict with verification status and analysis
-        """
-        prompt = f"""
+        
+        # Static prompt text around the article, built once
+        self._verify_prefix = """
         Analyze the following news article or headline and determine if it appears to be:
         1. TRUE - Based on verifiable facts and credible sources
         2. QUESTIONABLE - Contains dubious claims or lacks credibility or needs verification
         3. FALSE - Clearly false or misinformation
         
-        News: {news_text}
+        News: """
+        self._verify_suffix = """
         
         Provide your analysis in the following format:
         STATUS: [TRUE/QUESTIONABLE/FALSE]
         """
+        self._summarize_prefix = """
+        give me a concise summary of the following news article or headline:
+        News: """
+        self._summarize_suffix = """
+        
+        Summary:
+        """
+        self._analyze_prefix = """
+        Analyze the following news article or headline.
+        
+        1. Determine if it appears to be:
+           TRUE - Based on verifiable facts and credible sources
+           QUESTIONABLE - Contains dubious claims or lacks credibility or needs verification
+           FALSE - Clearly false or misinformation
+        2. Briefly explain your reasoning.
+        3. Give a concise summary of the article or headline.
+        
+        News: """
+        self._analyze_suffix = """
+        
+        Respond with "status" (TRUE/QUESTIONABLE/FALSE), "analysis" and "summary".
+        """
+    
+    @content_cached(should_cache=_no_error)
+    def verify_news(self, news_text):
+        """
+        Verify if the news is true or potentially fake
+        Returns: dict with verification status and analysis
+        """
+        prompt = f"{self._verify_prefix}{news_text}{self._verify_suffix}"
         
         try:
             response = self.model.generate_content(prompt)
@@ -67,21 +113,50 @@ class GeminiHandler:
                 'error': str(e)
             }
     
+    @content_cached(should_cache=_not_error_summary)
     def summarize_news(self, news_text):
         """
         Generate a concise summary of the news article
         Returns: summary string
         """
-        prompt = f"""
-        give me a concise summary of the following news article or headline:
-        News: {news_text}
-        
-        Summary:
-        """
+        prompt = f"{self._summarize_prefix}{news_text}{self._summarize_suffix}"
         
         try:
             response = self.model.generate_content(prompt)
             return response.text.strip()
         
         except Exception as e:
-            return f"Error generating summary: {str(e)}"
\ No newline at end of file
+            return f"Error generating summary: {str(e)}"
+    
+    @content_cached(should_cache=_no_error)
+    def analyze(self, news_text):
+        """
+        Verify and summarize the news in a single Gemini request
+        Returns: dict with verification status, analysis and summary
+        """
+        prompt = f"{self._analyze_prefix}{news_text}{self._analyze_suffix}"
+        
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=NewsAnalysis
+                )
+            )
+            result = json.loads(response.text)
+            
+            return {
+                'status': result.get('status', 'UNKNOWN').strip(),
+                'analysis': result.get('analysis', 'Unable to analyze').strip(),
+                'summary': result.get('summary', '').strip(),
+                'error': None
+            }
+        
+        except Exception as e:
+            return {
+                'status': 'ERROR',
+                'analysis': '',
+                'summary': '',
+                'error': str(e)
+            }
@@ -3,18 +3,44 @@ AI Bias Detector - Main Entry Point
 Detects political bias in news articles and verifies their authenticity
 """
 
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+import torch
 from gemini_handler import GeminiHandler
 from bias_detector_hf import BiasDetectorHF
-import matplotlib.pyplot as plt
 
 
 def print_separator():
     print("\n" + "=" * 70 + "\n")
 
 
+# Imported on first chart request; matplotlib's startup is slow
+_plt = None
+
+
+def _has_display():
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def _get_pyplot():
+    global _plt
+    if _plt is None:
+        import matplotlib
+        if not _has_display():
+            # No GUI available: render off-screen and save to a file
+            matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+
 def display_pie_chart(left_score, right_score, neutral_score):
-    """Display a pie chart of bias distribution"""
+    """Display a pie chart of bias distribution (saved to bias.png without a display)"""
+    plt = _get_pyplot()
+
     labels = ['Left', 'Right', 'Neutral']
     sizes = [left_score, right_score, neutral_score]
     colors = ['#3498db', '#e74c3c', '#95a5a6']
@@ -33,7 +59,13 @@ def display_pie_chart(left_score, right_score, neutral_score):
     plt.axis('equal')
     plt.title('Political Bias Distribution', fontsize=14, fontweight='bold')
     plt.tight_layout()
-    plt.show()
+
+    if _has_display():
+        plt.show()
+    else:
+        plt.savefig("bias.png")
+        plt.close()
+        print("📁 Chart saved to bias.png")
 
 
 def main():
@@ -41,20 +73,28 @@ def main():
     print(" " * 20 + "AI BIAS DETECTOR")
     print("=" * 70)
 
-    # Initialize handlers
+    # Initialize handlers; Gemini first so a bad API key exits before the
+    # model load starts (pool threads are joined at interpreter exit)
     try:
         print("\n🔧 Initializing Gemini API...")
         gemini = GeminiHandler()
-
-        print("\n🤖 Loading Hugging Face bias detection model...")
-        print("   (This may take a moment on first run - model will be cached)")
-        bias_detector = BiasDetectorHF()
-
-        print("\n✅ System initialized successfully!\n")
     except Exception as e:
         print(f"❌ Error initializing system: {str(e)}")
         sys.exit(1)
 
+    # Thread setup is process-wide, so it lives here rather than in the detector
+    torch.set_num_threads(os.cpu_count() or 4)
+
+    # Load the HF model in the background while the user types the
+    # first article
+    executor = ThreadPoolExecutor(max_workers=2)
+    detector_future = executor.submit(BiasDetectorHF)
+
+    print("\n🤖 Loading Hugging Face bias detection model in the background...")
+    print("   (This may take a moment on first run - model will be cached)")
+
+    print("\n✅ System initialized successfully!\n")
+
     while True:
         print_separator()
         print("Enter a news article headline or full article (or 'quit' to exit):")
@@ -72,25 +112,38 @@ def main():
 
         print("\n🔍 Processing your input...\n")
 
+        # One Gemini request (verification + summary) runs concurrently
+        # with the local model; results are still reported step by step
+        gemini_future = executor.submit(gemini.analyze, user_input)
+
+        try:
+            bias_detector = detector_future.result()
+        except Exception as e:
+            print(f"❌ Error loading bias detection model: {str(e)}")
+            executor.shutdown(wait=False, cancel_futures=True)
+            sys.exit(1)
+
+        bias_future = executor.submit(bias_detector.detect_bias, user_input)
+
         # STEP 1: Verify news
         print("STEP 1: Verifying news authenticity...")
         print("-" * 70)
 
-        verification_result = gemini.verify_news(user_input)
+        gemini_result = gemini_future.result()
 
-        if verification_result['error']:
-            print(f"❌ Error: {verification_result['error']}")
+        if gemini_result['error']:
+            print(f"❌ Error: {gemini_result['error']}")
             continue
 
-        print(f"✅ Verification Status: {verification_result['is_true']}")
-        print(f"📝 Analysis: {verification_result['analysis']}")
+        print(f"✅ Verification Status: {gemini_result['status']}")
+        print(f"📝 Analysis: {gemini_result['analysis']}")
 
         # STEP 2: Bias detection
         print_separator()
         print("STEP 2: Detecting political bias with ML model...")
         print("-" * 70)
 
-        bias_result = bias_detector.detect_bias(user_input)
+        bias_result = bias_future.result()
 
         print("\n📊 Bias Detection Results:")
         print(f"   Left Bias:    {bias_result['left']:.2f}%")
@@ -104,8 +157,7 @@ def main():
         print("STEP 3: Generating news summary...")
         print("-" * 70)
 
-        summary = gemini.summarize_news(user_input)
-        print(f"\n📄 Summary:\n{summary}\n")
+        print(f"\n📄 Summary:\n{gemini_result['summary']}\n")
 
         # STEP 4: Visualization
         print_separator()
@@ -124,6 +176,8 @@ def main():
             print("\n👋 Thank you for using AI Bias Detector!")
             break
 
+    executor.shutdown(wait=False, cancel_futures=True)
+
 
 if __name__ == "__main__":
     main()
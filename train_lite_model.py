@@ -0,0 +1,47 @@
+"""
+Train the lightweight bias classifier used by BiasDetectorHF(lite=True)
+TF-IDF features + logistic regression, pickled as a scikit-learn Pipeline
+
+Usage: python train_lite_model.py data.csv [models/bias_lite.pkl]
+The CSV needs a "text" column and a "label" column (0 = neutral, 1 = biased)
+"""
+
+import csv
+import os
+import pickle
+import sys
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    data_path = sys.argv[1]
+    out_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join("models", "bias_lite.pkl")
+
+    with open(data_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    texts = [row["text"] for row in rows]
+    labels = [int(row["label"]) for row in rows]
+
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)),
+        ("clf", LogisticRegression(max_iter=1000)),
+    ])
+    pipeline.fit(texts, labels)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "wb") as f:
+        pickle.dump(pipeline, f)
+
+    print(f"Saved lite model ({len(texts)} samples) to {out_path}")
+
+
+if __name__ == "__main__":
+    main()